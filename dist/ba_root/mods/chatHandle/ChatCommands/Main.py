@@ -13,6 +13,7 @@ import ba, _ba
 import setting
 
 from serverData import serverdata
+from playersData import pdata
 settings = setting.get_settings_data()
 
 def command_type(command):
@@ -90,7 +91,7 @@ def Command(msg, clientid):
 	
 	
 	if accountid in serverdata.clients:
-		if serverdata.clients[accountid]["isMuted"]:
+		if accountid in pdata.CacheData.muted:
 			_ba.screenmessage("You are on mute", transient=True, clients=[clientid])
 			return None
 	if serverdata.muted:
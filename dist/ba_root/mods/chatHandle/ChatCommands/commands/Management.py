@@ -3,7 +3,6 @@ from playersData import pdata
 # from tools.whitelist import add_to_white_list, add_commit_to_logs
 from serverData import serverdata
 import ba, _ba, time, setting
-import _thread
 from tools import playlist
 Commands = ['maxplayers','playlist','ban','kick', 'remove', 'end', 'quit', 'mute', 'unmute', 'slowmo', 'nv', 'dv', 'pause', 'cameramode', 'createrole', 'addrole', 'removerole', 'addcommand', 'addcmd', 'removecommand','getroles', 'removecmd', 'changetag','customtag','customeffect','add', 'spectators', 'lobbytime']
 CommandAliases = ['max','rm', 'next', 'restart', 'mutechat', 'unmutechat', 'sm', 'slow', 'night', 'day', 'pausegame', 'camera_mode', 'rotate_camera','effect']
@@ -134,14 +133,9 @@ def end(arguments):
 def ban(arguments):
 	try:
 		cl_id=int(arguments[0])
-		ac_id=""
 		for ros in _ba.get_game_roster():
 			if ros["client_id"]==cl_id:
-				_thread.start_new_thread(pdata.ban_player,(ros['account_id'],))
-				
-				ac_id=ros['account_id']
-		if ac_id in serverdata.clients:
-			serverdata.clients[ac_id]["isBan"]=True
+				pdata.ban_player(ros['account_id'])
 		kick(arguments)
 	except:
 		pass
@@ -160,14 +154,9 @@ def mute(arguments):
 		serverdata.muted=True
 	try:
 		cl_id=int(arguments[0])
-		ac_id=""
 		for ros in _ba.get_game_roster():
 			if ros["client_id"]==cl_id:
-				_thread.start_new_thread(pdata.mute,(ros['account_id'],))
-				
-				ac_id=ros['account_id']
-		if ac_id in serverdata.clients:
-			serverdata.clients[ac_id]["isMuted"]=True
+				pdata.mute(ros['account_id'])
 	except:
 		pass
 	return
@@ -179,14 +168,9 @@ def un_mute(arguments):
 		serverdata.muted=False
 	try:
 		cl_id=int(arguments[0])
-		ac_id=""
 		for ros in _ba.get_game_roster():
 			if ros["client_id"]==cl_id:
 				pdata.unmute(ros['account_id'])
-				ac_id=ros['account_id']
-		if ac_id in serverdata.clients:
-			serverdata.clients[ac_id]["isMuted"]=False
-		return
 	except:
 		pass
 
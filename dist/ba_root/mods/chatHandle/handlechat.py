@@ -46,7 +46,7 @@ def filter_chat_message(msg, client_id):
 			_ba.screenmessage("Server on mute", transient=True, clients=[client_id])
 			return
 
-		elif serverdata.clients[acid]["isMuted"]:
+		elif acid in pdata.CacheData.muted:
 			_ba.screenmessage("You are on mute", transient=True, clients=[client_id])
 			return None
 		elif servercheck.get_account_age(serverdata.clients[acid]["accountAge"]) < settings['minAgeToChatInHours']:
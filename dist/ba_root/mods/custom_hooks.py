@@ -28,7 +28,6 @@ from features import team_balancer, afk_check, fire_flies, dual_team_score as ne
 from stats import mystats
 from spazmod import modifyspaz
 from tools import servercheck, ServerUpdate, logger
-from playersData import pdata
 
 if TYPE_CHECKING:
     from typing import Optional, Any
@@ -94,9 +93,6 @@ def bootstraping():
         importcustomcharacters.enable()
 
     # import features
-    if settings["whitelist"]:
-        pdata.load_white_list()
-
     import_discord_bot()
     import_games()
     import_dual_team_score()
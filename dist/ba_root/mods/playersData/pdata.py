@@ -8,7 +8,13 @@ from typing import TYPE_CHECKING
 
 import time
 import os
+import json
+import atexit
+import copy
+import queue
+import sqlite3
 import _thread
+import threading
 
 from serverData import serverdata
 from tools.file_handle import OpenJson
@@ -20,8 +26,30 @@ if TYPE_CHECKING:
 
 
 PLAYERS_DATA_PATH = os.path.join(
-    _ba.env()["python_directory_user"], "playersData" + os.sep
+    _ba.env()["python_directory_user"], "playersData", ""
 )
+_PROFILES_PATH = os.path.join(PLAYERS_DATA_PATH, "profiles.json")
+_DATABASE_PATH = os.path.join(PLAYERS_DATA_PATH, "profiles.db")
+_ROLES_PATH = os.path.join(PLAYERS_DATA_PATH, "roles.json")
+_CUSTOM_PATH = os.path.join(PLAYERS_DATA_PATH, "custom.json")
+_WHITELIST_PATH = os.path.join(PLAYERS_DATA_PATH, "whitelist.json")
+FLUSH_INTERVAL = 5
+BATCH_DELAY = 0.1
+COMPACT_INTERVAL = 60
+_PROFILE_TEMPLATE = {
+    "display_string": None,
+    "profiles": None,
+    "name": None,
+    "isBan": False,
+    "isMuted": False,
+    "accountAge": None,
+    "registerOn": None,
+    "canStartKickVote": True,
+    "spamCount": 0,
+    "lastSpam": None,
+    "totaltimeplayer": 0,
+    "lastseen": 0,
+}
 
 
 class CacheData:  # pylint: disable=too-few-public-methods
@@ -30,7 +58,272 @@ class CacheData:  # pylint: disable=too-few-public-methods
     roles: dict = {}
     data: dict = {}
     custom: dict = {}
-    whitelist: list[str] = []
+    profiles: dict = {}
+    profiles_loaded: bool = False
+    account_to_roles: dict[str, set[str]] = {}
+    muted: set[str] = set()
+    banned: set[str] = set()
+    whitelist: set[str] = set()
+    whitelist_loaded: bool = False
+
+
+_dirty: set[str] = set()
+_write_queue: queue.Queue = queue.Queue()
+_write_lock = threading.RLock()
+_cache_lock = threading.RLock()
+_connection: sqlite3.Connection | None = None
+_pending_rows: dict[str, str] = {}
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Returns the connection to the database of changed profiles.
+
+    Returns
+    -------
+    sqlite3.Connection
+        connection to profiles.db
+    """
+    global _connection  # pylint: disable=global-statement
+    if _connection is None:
+        _connection = sqlite3.connect(
+            _DATABASE_PATH, check_same_thread=False
+        )
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("PRAGMA synchronous=NORMAL")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS profiles"
+            " (id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+    return _connection
+
+
+def _mark_dirty(name: str) -> None:
+    """Marks the cached data to be written by the writer thread.
+
+    Parameters
+    ----------
+    name : str
+        either "roles" or "custom"
+    """
+    _write_queue.put(("commit", name))
+
+
+def _flush_dirty() -> None:
+    """Commits all the cached data marked dirty since the last flush."""
+    while _dirty:
+        name = _dirty.pop()
+        try:
+            if name == "roles":
+                commit_roles(CacheData.roles)
+            elif name == "custom":
+                commit_c()
+        except Exception as err:  # pylint: disable=broad-except
+            print(f"Could not commit {name}. {err}")
+            _dirty.add(name)
+            return
+
+
+def _take_request(request: tuple) -> None:
+    """Records the request taken out of the queue as pending work.
+
+    Repeated requests for the same profile or data are coalesced into one.
+
+    Parameters
+    ----------
+    request : tuple
+        request taken out of the queue
+    """
+    kind, value = request
+    with _write_lock:
+        if kind == "profile":
+            _pending_rows[value[0]] = value[1]
+        else:
+            _dirty.add(value)
+
+
+def _drain_queue() -> None:
+    """Saves the queued profiles and collects the dirty data.
+
+    Profiles that could not be saved are kept and retried on the next call.
+    """
+    global _connection  # pylint: disable=global-statement
+    with _write_lock:
+        while True:
+            try:
+                _take_request(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if not _pending_rows:
+            return
+        try:
+            with _get_connection() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO profiles (id, data) VALUES (?, ?)",
+                    _pending_rows.items(),
+                )
+        except Exception as err:  # pylint: disable=broad-except
+            print(f"Could not save profiles. {err}")
+            # Reconnect on the next try in case the connection is broken.
+            if _connection is not None:
+                try:
+                    _connection.close()
+                except sqlite3.Error:
+                    pass
+            _connection = None
+            return
+        _pending_rows.clear()
+
+
+def _writer_loop() -> None:
+    """Single thread doing all the writes of the players data.
+
+    Changed profiles are saved BATCH_DELAY seconds after they are queued
+    so a burst of changes goes into a single transaction, dirty data is
+    flushed at most every FLUSH_INTERVAL seconds and the profiles are
+    compacted into profiles.json every COMPACT_INTERVAL seconds."""
+    last_flush = last_compact = time.time()
+    while True:
+        try:
+            request = _write_queue.get(timeout=FLUSH_INTERVAL)
+        except queue.Empty:
+            pass
+        else:
+            # Record it before waiting so _on_exit can not miss it.
+            _take_request(request)
+            time.sleep(BATCH_DELAY)
+        _drain_queue()
+
+        now = time.time()
+        if now - last_flush >= FLUSH_INTERVAL:
+            last_flush = now
+            _flush_dirty()
+        if now - last_compact >= COMPACT_INTERVAL:
+            last_compact = now
+            _compact_profiles()
+
+
+def _on_exit() -> None:
+    """Writes everything pending before the server shuts down."""
+    _drain_queue()
+    _flush_dirty()
+    _compact_profiles()
+
+
+def _save_profile(account_id: str) -> None:
+    """Queues the cached profile to be saved in the database.
+
+    The profile is serialized right away so later changes to the cached
+    dict do not leak into this save.
+
+    Parameters
+    ----------
+    account_id : str
+        account id of the client
+    """
+    data = json.dumps(CacheData.profiles[account_id])
+    _write_queue.put(("profile", (account_id, data)))
+
+
+def _apply_saved_profiles(profiles: dict) -> bool:
+    """Applies the profiles saved since the last compaction.
+
+    If profiles.json was changed after the last save (edited by hand while
+    the server was down), the saved profiles are dropped instead so the
+    edits are not overwritten.
+
+    Parameters
+    ----------
+    profiles : dict
+        profiles loaded from profiles.json
+
+    Returns
+    -------
+    bool
+        whether any saved profile was applied
+    """
+    if not os.path.exists(_DATABASE_PATH):
+        return False
+
+    last_save = max(
+        os.path.getmtime(path)
+        for path in (_DATABASE_PATH, _DATABASE_PATH + "-wal")
+        if os.path.exists(path)
+    )
+    with _write_lock:
+        with _get_connection() as connection:
+            if os.path.getmtime(_PROFILES_PATH) > last_save:
+                connection.execute("DELETE FROM profiles")
+                return False
+            rows = connection.execute("SELECT id, data FROM profiles")
+            applied = False
+            for account_id, data in rows:
+                profiles[account_id] = json.loads(data)
+                applied = True
+    return applied
+
+
+def _compact_profiles() -> None:
+    """Rewrites profiles.json from the cache if any profile was saved.
+
+    Nothing is done until the profiles are loaded, otherwise the empty
+    cache would be written over profiles.json."""
+    if not CacheData.profiles_loaded or not os.path.exists(_DATABASE_PATH):
+        return
+    try:
+        with _write_lock:
+            saved = _get_connection().execute(
+                "SELECT EXISTS (SELECT 1 FROM profiles)"
+            ).fetchone()[0]
+            if saved:
+                commit_profiles()
+    except Exception as err:  # pylint: disable=broad-except
+        print(f"Could not compact profiles. {err}")
+
+
+def _load_profiles() -> dict:
+    """Loads the profiles into the cache on first use.
+
+    Returns
+    -------
+    dict
+        cached profiles of the players
+    """
+    if not CacheData.profiles_loaded:
+        # The write lock is always taken before the cache lock.
+        with _write_lock, _cache_lock:
+            if not CacheData.profiles_loaded:
+                with OpenJson(_PROFILES_PATH) as profiles_file:
+                    profiles = profiles_file.load_mmap()
+                applied = _apply_saved_profiles(profiles)
+                _index_flags(profiles)
+                CacheData.profiles = profiles
+                CacheData.profiles_loaded = True
+                if applied:
+                    # Left over from an unclean shutdown, fold them into
+                    # profiles.json right away.
+                    commit_profiles()
+    return CacheData.profiles
+
+
+def _index_flags(profiles: dict) -> None:
+    """Collects the muted and banned account ids of the profiles.
+
+    Parameters
+    ----------
+    profiles : dict
+        profiles of all players
+    """
+    CacheData.muted = {
+        account_id
+        for account_id, profile in profiles.items()
+        if profile.get("isMuted")
+    }
+    CacheData.banned = {
+        account_id
+        for account_id, profile in profiles.items()
+        if profile.get("isBan")
+    }
 
 
 def get_info(account_id: str) -> dict | None:
@@ -46,11 +339,9 @@ def get_info(account_id: str) -> dict | None:
     dict | None
         information of client
     """
-    with OpenJson(PLAYERS_DATA_PATH + "profiles.json") as profiles_file:
-        profiles = profiles_file.load()
-        if account_id in profiles:
-            return profiles[account_id]
-    return None
+    if CacheData.profiles_loaded:
+        return CacheData.profiles.get(account_id)
+    return _load_profiles().get(account_id)
 
 
 def get_profiles() -> dict:
@@ -61,21 +352,42 @@ def get_profiles() -> dict:
     dict
         profiles of the players
     """
-    with OpenJson(PLAYERS_DATA_PATH + "profiles.json") as profiles_file:
-        profiles = profiles_file.load()
-        return profiles
+    return _load_profiles()
+
 
+def commit_profiles(profiles: dict | None = None) -> None:
+    """Commits the cached profiles in profiles.json and clears the saved
+    profiles from the database.
 
-def commit_profiles(profiles: dict) -> None:
-    """Commits the given profiles in the database.
+    The profiles are copied under the cache lock and serialized outside of
+    it, so other threads can keep changing the cache meanwhile. The write
+    lock is held throughout and taken first, like everywhere else. Queued
+    profiles are saved before the copy, so clearing the database never
+    drops a profile newer than the copy.
 
     Parameters
     ----------
-    profiles : dict
-        profiles of all players
+    profiles : dict, optional
+        profiles of all players to replace the cache with, by default None
     """
-    with OpenJson(PLAYERS_DATA_PATH + "profiles.json") as profiles_file:
-        profiles_file.dump(profiles, indent=4)
+    with _write_lock:
+        _drain_queue()
+        with _cache_lock:
+            if profiles is not None:
+                CacheData.profiles = profiles
+                CacheData.profiles_loaded = True
+                _index_flags(profiles)
+            elif not CacheData.profiles_loaded:
+                return
+            snapshot = {
+                account_id: dict(profile)
+                for account_id, profile in CacheData.profiles.items()
+            }
+        with OpenJson(_PROFILES_PATH) as profiles_file:
+            profiles_file.dump(snapshot)
+        if os.path.exists(_DATABASE_PATH):
+            with _get_connection() as connection:
+                connection.execute("DELETE FROM profiles")
 
 
 def add_profile(
@@ -97,30 +409,27 @@ def add_profile(
     account_age : int
         account_age of the account
     """
-    with OpenJson(PLAYERS_DATA_PATH + "profiles.json") as profiles_file:
-        profiles = profiles_file.load()
-        profiles[account_id] = {
-            "display_string": display_string,
-            "profiles": [],
-            "name": current_name,
-            "isBan": False,
-            "isMuted": False,
-            "accountAge": account_age,
-            "registerOn": time.time(),
-            "canStartKickVote": True,
-            "spamCount": 0,
-            "lastSpam": time.time(),
-            "totaltimeplayer": 0,
-            "lastseen": 0,
-        }
-    commit_profiles(profiles)
-
-    serverdata.clients[account_id] = profiles[account_id]
-    serverdata.clients[account_id]["warnCount"] = 0
-    serverdata.clients[account_id]["lastWarned"] = time.time()
-    serverdata.clients[account_id]["verified"] = False
-    serverdata.clients[account_id]["rejoincount"] = 1
-    serverdata.clients[account_id]["lastJoin"] = time.time()
+    now = time.time()
+    profiles = get_profiles()
+    profile = _PROFILE_TEMPLATE.copy()
+    profile["display_string"] = [display_string]
+    profile["profiles"] = []
+    profile["name"] = current_name
+    profile["accountAge"] = account_age
+    profile["registerOn"] = now
+    profile["lastSpam"] = now
+    with _cache_lock:
+        profiles[account_id] = profile
+    _save_profile(account_id)
+
+    # Session fields go on a copy so they never end up in the profile.
+    client = dict(profile)
+    serverdata.clients[account_id] = client
+    client["warnCount"] = 0
+    client["lastWarned"] = now
+    client["verified"] = False
+    client["rejoincount"] = 1
+    client["lastJoin"] = now
 
 
 def update_display_string(account_id: str, display_string: str) -> None:
@@ -136,7 +445,7 @@ def update_display_string(account_id: str, display_string: str) -> None:
     profiles = get_profiles()
     if account_id in profiles:
         profiles[account_id]["display_string"] = display_string
-        commit_profiles(profiles)
+        _save_profile(account_id)
 
 
 def update_profile(
@@ -158,25 +467,34 @@ def update_profile(
     name : str, optional
         name to be updated, by default None
     """
-    with OpenJson(PLAYERS_DATA_PATH + "profiles.json") as profiles_file:
-        profiles = profiles_file.load()
-
-        if profiles is None:
-            return
+    profile = get_profiles().get(account_id)
+    if profile is None:
+        return
 
-        if account_id in profiles and display_string is not None:
-            if display_string not in profiles[account_id]["display_string"]:
-                profiles[account_id]["display_string"].append(display_string)
+    changed = False
+    if display_string is not None:
+        display_strings = profile["display_string"]
+        # Older profiles stored a single display string.
+        if isinstance(display_strings, str):
+            display_strings = [display_strings]
+        if display_string not in display_strings:
+            profile["display_string"] = display_strings + [display_string]
+            changed = True
 
-        if allprofiles is not None:
-            for profile in allprofiles:
-                if profile not in profiles[account_id]["profiles"]:
-                    profiles[account_id]["profiles"].append(profile)
+    if allprofiles is not None:
+        # dict keys dedupe like a set but keep the profiles in order.
+        merged = list(dict.fromkeys(profile["profiles"] + allprofiles))
+        if len(merged) != len(profile["profiles"]):
+            profile["profiles"] = merged
+            changed = True
 
-        if name is not None:
-            profiles[account_id]["name"] = name
+    if name is not None and name != profile["name"]:
+        profile["name"] = name
+        changed = True
 
-        commit_profiles(profiles)
+    # Players rejoin all the time, only save when something changed.
+    if changed:
+        _save_profile(account_id)
 
 
 def ban_player(account_id: str) -> None:
@@ -190,7 +508,8 @@ def ban_player(account_id: str) -> None:
     profiles = get_profiles()
     if account_id in profiles:
         profiles[account_id]["isBan"] = True
-        _thread.start_new_thread(commit_profiles, (profiles,))
+        CacheData.banned.add(account_id)
+        _save_profile(account_id)
 
 
 def mute(account_id: str) -> None:
@@ -204,7 +523,8 @@ def mute(account_id: str) -> None:
     profiles = get_profiles()
     if account_id in profiles:
         profiles[account_id]["isMuted"] = True
-        _thread.start_new_thread(commit_profiles, (profiles,))
+        CacheData.muted.add(account_id)
+        _save_profile(account_id)
 
 
 def unmute(account_id: str) -> None:
@@ -218,7 +538,8 @@ def unmute(account_id: str) -> None:
     profiles = get_profiles()
     if account_id in profiles:
         profiles[account_id]["isMuted"] = False
-        _thread.start_new_thread(commit_profiles, (profiles,))
+        CacheData.muted.discard(account_id)
+        _save_profile(account_id)
 
 
 def update_spam(account_id: str, spam_count: int, last_spam: float) -> None:
@@ -237,8 +558,7 @@ def update_spam(account_id: str, spam_count: int, last_spam: float) -> None:
     if account_id in profiles:
         profiles[account_id]["spamCount"] = spam_count
         profiles[account_id]["lastSpam"] = last_spam
-
-        commit_profiles(profiles)
+        _save_profile(account_id)
 
 
 def commit_roles(data: dict) -> None:
@@ -252,26 +572,50 @@ def commit_roles(data: dict) -> None:
     if not data:
         return
 
-    with OpenJson(PLAYERS_DATA_PATH + "roles.json") as roles_file:
-        roles_file.format(data)
+    with _cache_lock:
+        roles = {
+            role: {
+                **info,
+                "commands": sorted(info["commands"]),
+                "ids": sorted(info["ids"]),
+            }
+            for role, info in data.items()
+        }
+    with OpenJson(_ROLES_PATH) as roles_file:
+        roles_file.format(roles)
 
 
 def get_roles() -> dict:
     """Returns the roles.
 
+    The "commands" and "ids" of every role are kept as sets in the cache.
+
     Returns
     -------
     dict
         roles
     """
-    if CacheData.roles == {}:
-        with OpenJson(PLAYERS_DATA_PATH + "roles.json") as roles_file:
-            roles = roles_file.load()
-            CacheData.roles = roles
-        return roles
+    if not CacheData.roles:
+        with _cache_lock:
+            if not CacheData.roles:
+                _load_roles()
     return CacheData.roles
 
 
+def _load_roles() -> None:
+    """Loads the roles into the cache and indexes them by account id."""
+    with OpenJson(_ROLES_PATH) as roles_file:
+        roles = roles_file.load()
+    account_to_roles: dict[str, set[str]] = {}
+    for role, info in roles.items():
+        info["commands"] = set(info["commands"])
+        info["ids"] = set(info["ids"])
+        for account_id in info["ids"]:
+            account_to_roles.setdefault(account_id, set()).add(role)
+    CacheData.account_to_roles = account_to_roles
+    CacheData.roles = roles
+
+
 def create_role(role: str) -> None:
     """Ceates the role.
 
@@ -282,17 +626,17 @@ def create_role(role: str) -> None:
     """
     roles = get_roles()
 
-    if role in roles:
-        return
+    with _cache_lock:
+        if role in roles:
+            return
 
-    roles[role] = {
-        "tag": role,
-        "tagcolor": [1, 1, 1],
-        "commands": [],
-        "ids": [],
-    }
-    CacheData.roles = roles
-    commit_roles(roles)
+        roles[role] = {
+            "tag": role,
+            "tagcolor": [1, 1, 1],
+            "commands": set(),
+            "ids": set(),
+        }
+    _mark_dirty("roles")
 
 
 def add_player_role(role: str, account_id: str) -> None:
@@ -309,9 +653,12 @@ def add_player_role(role: str, account_id: str) -> None:
 
     if role in roles:
         if account_id not in roles[role]["ids"]:
-            roles[role]["ids"].append(account_id)
-            CacheData.roles = roles
-            commit_roles(roles)
+            with _cache_lock:
+                roles[role]["ids"].add(account_id)
+                CacheData.account_to_roles.setdefault(
+                    account_id, set()
+                ).add(role)
+            _mark_dirty("roles")
 
     else:
         print("no role such")
@@ -334,9 +681,12 @@ def remove_player_role(role: str, account_id: str) -> str:
     """
     roles = get_roles()
     if role in roles:
-        roles[role]["ids"].remove(account_id)
-        CacheData.roles = roles
-        commit_roles(roles)
+        if account_id not in roles[role]["ids"]:
+            return "not in " + role
+        with _cache_lock:
+            roles[role]["ids"].discard(account_id)
+            CacheData.account_to_roles.get(account_id, set()).discard(role)
+        _mark_dirty("roles")
         return "removed from " + role
     return "role not exists"
 
@@ -359,9 +709,9 @@ def add_command_role(role: str, command: str) -> str:
     roles = get_roles()
     if role in roles:
         if command not in roles[role]["commands"]:
-            roles[role]["commands"].append(command)
-            CacheData.roles = roles
-            commit_roles(roles)
+            with _cache_lock:
+                roles[role]["commands"].add(command)
+            _mark_dirty("roles")
             return "command added to " + role
     return "command not exists"
 
@@ -382,13 +732,15 @@ def remove_command_role(role: str, command: str) -> str:
         status of the removing command
     """
     roles = get_roles()
-    if role in roles:
-        if command in roles[role]["commands"]:
-            roles[role]["commands"].remove(command)
-            CacheData.roles = roles
-            commit_roles(roles)
-            return "command added to " + role
-    return "command not exists"
+    if role not in roles:
+        return "role not exists"
+    if command not in roles[role]["commands"]:
+        return "command not present"
+
+    with _cache_lock:
+        roles[role]["commands"].discard(command)
+    _mark_dirty("roles")
+    return "command removed from " + role
 
 
 def change_role_tag(role: str, tag: str) -> str:
@@ -409,8 +761,7 @@ def change_role_tag(role: str, tag: str) -> str:
     roles = get_roles()
     if role in roles:
         roles[role]["tag"] = tag
-        CacheData.roles = roles
-        commit_roles(roles)
+        _mark_dirty("roles")
         return "tag changed"
     return "role not exists"
 
@@ -428,13 +779,8 @@ def get_player_roles(account_id: str) -> list[str]:
     list[str]
         list of the roles
     """
-
-    roles = get_roles()
-    have_roles = []
-    for role in roles:
-        if account_id in roles[role]["ids"]:
-            have_roles.append(role)
-    return have_roles
+    get_roles()
+    return list(CacheData.account_to_roles.get(account_id, ()))
 
 
 def get_custom() -> dict:
@@ -445,10 +791,11 @@ def get_custom() -> dict:
     dict
         custom effects
     """
-    if CacheData.custom == {}:
-        with OpenJson(PLAYERS_DATA_PATH + "custom.json") as custom_file:
-            custom = custom_file.load()
-        return custom
+    if not CacheData.custom:
+        with _cache_lock:
+            if not CacheData.custom:
+                with OpenJson(_CUSTOM_PATH) as custom_file:
+                    CacheData.custom = custom_file.load()
     return CacheData.custom
 
 
@@ -463,9 +810,9 @@ def set_effect(effect: str, accout_id: str) -> None:
         account id of the client
     """
     custom = get_custom()
-    custom["customeffects"][accout_id] = effect
-    CacheData.custom = custom
-    commit_c()
+    with _cache_lock:
+        custom["customeffects"][accout_id] = effect
+    _mark_dirty("custom")
 
 
 def set_tag(tag: str, account_id: str) -> None:
@@ -479,9 +826,9 @@ def set_tag(tag: str, account_id: str) -> None:
         account id of the client
     """
     custom = get_custom()
-    custom["customtag"][account_id] = tag
-    CacheData.custom = custom
-    commit_c()
+    with _cache_lock:
+        custom["customtag"][account_id] = tag
+    _mark_dirty("custom")
 
 
 def remove_effect(account_id: str) -> None:
@@ -493,9 +840,9 @@ def remove_effect(account_id: str) -> None:
         account id of the client
     """
     custom = get_custom()
-    custom["customeffects"].pop(account_id)
-    CacheData.custom = custom
-    commit_c()
+    with _cache_lock:
+        custom["customeffects"].pop(account_id)
+    _mark_dirty("custom")
 
 
 def remove_tag(account_id: str) -> None:
@@ -507,15 +854,17 @@ def remove_tag(account_id: str) -> None:
         account id of the client
     """
     custom = get_custom()
-    custom["customtag"].pop(account_id)
-    CacheData.custom = custom
-    commit_c()
+    with _cache_lock:
+        custom["customtag"].pop(account_id)
+    _mark_dirty("custom")
 
 
 def commit_c():
     """Commits the custom data into the custom.json."""
-    with OpenJson(PLAYERS_DATA_PATH + "custom.json") as custom_file:
-        custom_file.dump(CacheData.custom, indent=4)
+    with _cache_lock:
+        custom = copy.deepcopy(CacheData.custom)
+    with OpenJson(_CUSTOM_PATH) as custom_file:
+        custom_file.dump(custom)
 
 
 def update_toppers(topper_list: list[str]) -> None:
@@ -529,13 +878,36 @@ def update_toppers(topper_list: list[str]) -> None:
     roles = get_roles()
     if "top5" not in roles:
         create_role("top5")
-    CacheData.roles["top5"]["ids"] = topper_list
-    commit_roles(roles)
+    with _cache_lock:
+        for account_id in roles["top5"]["ids"]:
+            CacheData.account_to_roles.get(account_id, set()).discard("top5")
+        roles["top5"]["ids"] = set(topper_list)
+        for account_id in topper_list:
+            CacheData.account_to_roles.setdefault(account_id, set()).add(
+                "top5"
+            )
+    _mark_dirty("roles")
 
 
 def load_white_list() -> None:
     """Loads the whitelist."""
-    with OpenJson(PLAYERS_DATA_PATH + "whitelist.json") as whitelist_file:
-        data = whitelist_file.load()
-        for account_id in data:
-            CacheData.whitelist.append(account_id)
+    with OpenJson(_WHITELIST_PATH) as whitelist_file:
+        CacheData.whitelist = set(whitelist_file.load())
+    CacheData.whitelist_loaded = True
+
+
+def get_whitelist() -> set[str]:
+    """Returns the whitelisted account ids, loading them on first use.
+
+    Returns
+    -------
+    set[str]
+        whitelisted account ids
+    """
+    if not CacheData.whitelist_loaded:
+        load_white_list()
+    return CacheData.whitelist
+
+
+_thread.start_new_thread(_writer_loop, ())
+atexit.register(_on_exit)
@@ -13,11 +13,17 @@ from typing import TYPE_CHECKING
 from dataclasses import dataclass
 
 import json
+import mmap
 import os
 import re
 
 from filelock import FileLock
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 if TYPE_CHECKING:
     pass
 
@@ -38,24 +44,53 @@ class JsonFile:
             PathNotExistsError(f"Path does not exists. {self.path}")
 
         with FileLock(self.path):
-            with open(self.path, mode="r", encoding="utf-8") as json_file:
+            with open(self.path, mode="rb") as json_file:
                 try:
-                    data = json.load(json_file, **kw)
+                    if orjson is not None and not kw:
+                        data = orjson.loads(json_file.read())
+                    else:
+                        data = json.load(json_file, **kw)
                 except json.JSONDecodeError:
                     print(f"Could not load json. {self.path}", end="")
                     print("Creating json in the file.", end="")
                     data = {}
-                    self.dump(data)
+                    self._write(b"{}")
             return data
 
+    def load_mmap(self) -> dict:
+        """Loads the json file by parsing a memory map of it.
+
+        Saves copying big files into memory before parsing. Falls back
+        to load if orjson is not available or the file can not be parsed."""
+        if orjson is None or not os.path.exists(self.path):
+            return self.load()
+
+        data = None
+        with FileLock(self.path):
+            with open(self.path, mode="rb") as json_file:
+                if os.fstat(json_file.fileno()).st_size:
+                    with mmap.mmap(
+                        json_file.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as mapped, memoryview(mapped) as view:
+                        try:
+                            data = orjson.loads(view)
+                        except json.JSONDecodeError:
+                            pass
+        if data is None:
+            return self.load()
+        return data
+
     def dump(self, data: dict, **kw) -> None:
         """Dumps the json file."""
         if not os.path.exists(self.path):
             PathNotExistsError(f"Path does not exists. {self.path}")
 
         with FileLock(self.path):
-            with open(self.path, mode="w", encoding="utf-8") as json_file:
-                json.dump(data, json_file, **kw)
+            if orjson is not None and set(kw) <= {"indent"}:
+                option = orjson.OPT_INDENT_2 if kw.get("indent") else 0
+                self._write(orjson.dumps(data, option=option))
+            else:
+                self._write(json.dumps(data, **kw).encode("utf-8"))
 
     def format(self, data: dict) -> None:
         """Dumps the json file."""
@@ -67,9 +102,19 @@ class JsonFile:
             output2 = re.sub(r'": \[\s+', '": [', output)
             output3 = re.sub(r'",\s+', '", ', output2)
             output4 = re.sub(r'"\s+\]', '"]', output3)
-
-            with open(self.path, mode="w", encoding="utf-8") as json_file:
-                json_file.write(output4)
+            self._write(output4.encode("utf-8"))
+
+    def _write(self, output: bytes) -> None:
+        """Atomically replaces the json file with the output.
+
+        The output is written and synced to a temporary file first so a
+        crash in the middle of the write never leaves a corrupted file."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="wb") as json_file:
+            json_file.write(output)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(tmp_path, self.path)
 
 
 class OpenJson:
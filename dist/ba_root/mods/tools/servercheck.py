@@ -90,7 +90,7 @@ class checkserver(object):
 					
 					return
 				if settings["whitelist"] and ros["account_id"]!=None:
-					if ros["account_id"] not in pdata.CacheData.whitelist:
+					if ros["account_id"] not in pdata.get_whitelist():
 						_ba.screenmessage("Not in whitelist,contact admin",color=(1,0,0),transient=True,clients=[ros['client_id']])
 						logger.log(d_str+"||"+ros["account_id"]+" | kicked > not in whitelist")
 						_ba.disconnect_client(ros['client_id'])
@@ -144,10 +144,11 @@ def on_player_join_server(pbid,player_data):
 	
 	if player_data!=None:
 		device_strin=""
-		if player_data["isBan"] or get_account_age(player_data["accountAge"]) < settings["minAgeToJoinInHours"]:
+		banned=pbid in pdata.CacheData.banned
+		if banned or get_account_age(player_data["accountAge"]) < settings["minAgeToJoinInHours"]:
 			for ros in _ba.get_game_roster():
 				if ros['account_id']==pbid:
-					if not player_data["isBan"]:
+					if not banned:
 						_ba.screenmessage("New Accounts not allowed here , come back later",color=(1,0,0), transient=True,clients=[ros['client_id']])
 					logger.log(pbid+" | kicked > reason:Banned account")
 					_ba.disconnect_client(ros['client_id'])
@@ -155,7 +156,7 @@ def on_player_join_server(pbid,player_data):
 			return
 		else:
 			if pbid not in serverdata.clients:
-				serverdata.clients[pbid]=player_data
+				serverdata.clients[pbid]=dict(player_data)
 				serverdata.clients[pbid]["warnCount"]=0
 				serverdata.clients[pbid]["lastWarned"]=time.time()
 				serverdata.clients[pbid]["verified"]=False
@@ -352,17 +353,15 @@ def get_account_age(ct):
 
 def reportSpam(id):
 	now=time.time()
-	profiles=pdata.get_profiles()
-	if id in profiles:
-		count=profiles[id]["spamCount"]
+	profile=pdata.get_info(id)
+	if profile is not None:
+		count=profile["spamCount"]
 		
-		if now-profiles[id]["lastSpam"] < 2*24*60*60:
+		if now-profile["lastSpam"] < 2*24*60*60:
 			count+=1
 			if count > 3:
-				profiles[id]["isBan"]=True
+				pdata.ban_player(id)
 		else:
 			count =0
 
-		profiles[id]["spamCount"]=count
-		profiles[id]["lastSpam"]=now
-		pdata.commit_profiles(profiles)
\ No newline at end of file
+		pdata.update_spam(id,count,now)
\ No newline at end of file